@@ -1,213 +1,382 @@
 from mesa import Agent, Model
-from mesa.time import RandomActivation
+from mesa.time import BaseScheduler
 from mesa.space import MultiGrid
 from mesa.datacollection import DataCollector
 from mesa.visualization.modules import CanvasGrid, ChartModule, TextElement
 from mesa.visualization.UserParam import UserSettableParameter
 from mesa.visualization.ModularVisualization import ModularServer
-import random
+import collections
+import io
+import multiprocessing
+import sys
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; without it _tick_numpy is used
+    njit = None
+
+
+def _drain(source, draws, order):
+    # Takers along axis 0 take their draw from `source` in turn, the k-th turn
+    # going to taker order[k]; a taker facing five units or fewer takes
+    # everything that is left.
+    left = source - (np.cumsum(draws, axis=0) - draws)
+    take = np.where(left > 5, draws, left)  # draws never exceed 5, so no min() is needed
+    take[np.cumsum(left <= 5, axis=0) > 1] = 0  # source already emptied
+    taken = np.empty_like(take)
+    taken[order] = take
+    return taken
+
+
+def _tick_numpy(total_waste, collected, sorted_, recycled, draws_c, draws_s, draws_r, order_c, order_s, order_r):
+    # Collection: each collector draws from the shared waste pool
+    collect = _drain(total_waste, draws_c, order_c)
+    collected += collect
+    total_waste -= int(collect.sum())
+
+    # Sorting: every sorter draws from every collector
+    sort = _drain(collected, draws_s, order_s)
+    sorted_ += sort.sum(axis=1, dtype=np.int32)
+    collected -= sort.sum(axis=0, dtype=np.int32)
+
+    # Recycling: every recycler draws from every sorter
+    recycle = _drain(sorted_, draws_r, order_r)
+    recycled += recycle.sum(axis=1, dtype=np.int32)
+    sorted_ -= recycle.sum(axis=0, dtype=np.int32)
+    return total_waste, collect, sort, recycle
+
+
+if njit is not None:
+    # The same pipeline as loops, which numba compiles into one native pass. Role
+    # sizes are small, so the loops run serially: thread start-up would cost more
+    # than the work, and run_many already keeps every core busy.
+    @njit(cache=True)
+    def _drain_loops(source, draws, order):
+        # Unlike _drain, this also removes the takes from `source` in place
+        take = np.zeros_like(draws)
+        for j in range(source.shape[0]):
+            left = source[j]
+            for k in range(order.shape[0]):
+                t = draws[k, j] if left > 5 else left
+                take[order[k], j] = t
+                left -= t
+            source[j] = left
+        return take
+
+    @njit(cache=True)
+    def _tick_numba(total_waste, collected, sorted_, recycled, draws_c, draws_s, draws_r, order_c, order_s, order_r):
+        pool = np.full(1, total_waste, np.int32)
+        collect = _drain_loops(pool, draws_c.reshape(-1, 1), order_c)[:, 0]
+        collected += collect
+
+        sort = _drain_loops(collected, draws_s, order_s)
+        for s in range(sort.shape[0]):
+            sorted_[s] += sort[s].sum()
+
+        recycle = _drain_loops(sorted_, draws_r, order_r)
+        for r in range(recycle.shape[0]):
+            recycled[r] += recycle[r].sum()
+        return int(pool[0]), collect, sort, recycle
+
+    _tick = _tick_numba
+else:
+    _tick = _tick_numpy
 
 
 class CollectionAgent(Agent):
-    def __init__(self, unique_id, model):
-        super().__init__(unique_id, model)
-        self.collected_waste = 0
+    __slots__ = ("index",)
 
-    def step(self):
-        if self.model.total_waste > 0:
-            collect = min(random.randint(1, 5), self.model.total_waste)
-            if self.model.total_waste <= 5:
-                collect = self.model.total_waste
-            self.collected_waste += collect
-            self.model.total_waste -= collect
-            self.model.logger.append(f"CollectionAgent {self.unique_id} collected {collect} units of waste.")
-        self.random_move()
+    def __init__(self, unique_id, model, index):
+        super().__init__(unique_id, model)
+        self.index = index
 
-    def random_move(self):
-        possible_moves = self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False)
-        new_position = self.random.choice(possible_moves)
-        self.model.grid.move_agent(self, new_position)
+    @property
+    def collected_waste(self):
+        return int(self.model.collected[self.index])
 
 
 class SortingAgent(Agent):
-    def __init__(self, unique_id, model):
+    __slots__ = ("index",)
+
+    def __init__(self, unique_id, model, index):
         super().__init__(unique_id, model)
-        self.sorted_waste = 0
+        self.index = index
 
-    def step(self):
-        for agent in self.model.schedule.agents:
-            if isinstance(agent, CollectionAgent) and agent.collected_waste > 0:
-                sorted_waste = random.randint(1, min(agent.collected_waste, 5))
-                if agent.collected_waste <= 5:
-                    sorted_waste = agent.collected_waste
-                self.sorted_waste += sorted_waste
-                agent.collected_waste -= sorted_waste
-                self.model.logger.append(f"SortingAgent {self.unique_id} sorted {sorted_waste} units of waste from CollectionAgent {agent.unique_id}.")
-        self.random_move()
-
-    def random_move(self):
-        possible_moves = self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False)
-        new_position = self.random.choice(possible_moves)
-        self.model.grid.move_agent(self, new_position)
+    @property
+    def sorted_waste(self):
+        return int(self.model.sorted_[self.index])
 
 
 class RecyclingAgent(Agent):
-    def __init__(self, unique_id, model):
+    __slots__ = ("index",)
+
+    def __init__(self, unique_id, model, index):
         super().__init__(unique_id, model)
-        self.recycled_waste = 0
+        self.index = index
+
+    @property
+    def recycled_waste(self):
+        return int(self.model.recycled[self.index])
+
 
+class VectorizedActivation(BaseScheduler):
+    # Activates each role as one batch, collectors first, then sorters, then
+    # recyclers. Within a role agents take turns in a fresh random order every
+    # step, like RandomActivation, using permutations of array indices.
     def step(self):
-        for agent in self.model.schedule.agents:
-            if isinstance(agent, SortingAgent) and agent.sorted_waste > 0:
-                recycled = random.randint(1, min(agent.sorted_waste, 5))
-                if agent.sorted_waste <= 5:
-                    recycled = agent.sorted_waste
-                self.recycled_waste += recycled
-                agent.sorted_waste -= recycled
-                self.model.logger.append(f"RecyclingAgent {self.unique_id} recycled {recycled} units of waste from SortingAgent {agent.unique_id}.")
-        self.random_move()
-
-    def random_move(self):
-        possible_moves = self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False)
-        new_position = self.random.choice(possible_moves)
-        self.model.grid.move_agent(self, new_position)
+        model = self.model
+        c, s, r = len(model.collected), len(model.sorted_), len(model.recycled)
+        draws = model.rng.integers(1, 6, size=c + s * c + r * s, dtype=np.int32)
+        model.total_waste, collect, sort, recycle = _tick(
+            model.total_waste,
+            model.collected,
+            model.sorted_,
+            model.recycled,
+            draws[:c],
+            draws[c:c + s * c].reshape(s, c),
+            draws[c + s * c:].reshape(r, s),
+            model.rng.permutation(c),
+            model.rng.permutation(s),
+            model.rng.permutation(r),
+        )
+        self.steps += 1
+        self.time += 1
+        return collect, sort, recycle
 
 
 class EWasteModel(Model):
-    def __init__(self, width, height, num_collectors, num_sorters, num_recyclers, max_steps):
+    def __init__(self, width, height, num_collectors, num_sorters, num_recyclers, max_steps, seed=None, verbose=False):
         super().__init__()
         self.grid = MultiGrid(width, height, torus=False)
-        self.schedule = RandomActivation(self)
+        self.schedule = VectorizedActivation(self)
         self.max_steps = max_steps
         self.current_step = 0
         self.total_waste = 100
-        self.logger = []
+        self.verbose = verbose
+        self.log_buf = io.StringIO()  # console lines for the current step only
+        self.ui_log = collections.deque(maxlen=100)  # summary/stop lines shown in the UI
+
+        # Agent state lives in one array per role; the agents only carry ids and positions
+        self.rng = np.random.default_rng(seed)
+        self.collected = np.zeros(num_collectors, np.int32)
+        self.sorted_ = np.zeros(num_sorters, np.int32)
+        self.recycled = np.zeros(num_recyclers, np.int32)
+        # Positions are packed into one cell index per agent: y * width + x. uint16
+        # covers grids of up to 65,536 cells; anything larger falls back to uint32.
+        cell_dtype = np.uint16 if width * height <= 1 << 16 else np.uint32
+        self.cells = self.rng.integers(
+            0, width * height, size=num_collectors + num_sorters + num_recyclers, dtype=cell_dtype
+        )
+        self.collectors = []
+        self.sorters = []
+        self.recyclers = []
+
+        # Moore neighbourhoods never change on a fixed grid, so look them up once per cell
+        self.neighbors = np.zeros((width * height, 8), cell_dtype)
+        self.neighbor_counts = np.zeros(width * height, np.uint8)
+        for x in range(width):
+            for y in range(height):
+                moves = self.grid.get_neighborhood((x, y), moore=True, include_center=False)
+                self.neighbors[y * width + x, :len(moves)] = [ny * width + nx for nx, ny in moves]
+                self.neighbor_counts[y * width + x] = len(moves)
 
         for i in range(1, num_collectors + 1):
-            collector = CollectionAgent(i, self)
-            x, y = random.randint(0, width - 1), random.randint(0, height - 1)
+            collector = CollectionAgent(i, self, i - 1)
+            y, x = divmod(int(self.cells[i - 1]), width)
             self.grid.place_agent(collector, (x, y))
             self.schedule.add(collector)
+            self.collectors.append(collector)
 
         for i in range(num_collectors + 1, num_collectors + num_sorters + 1):
-            sorter = SortingAgent(i, self)
-            x, y = random.randint(0, width - 1), random.randint(0, height - 1)
+            sorter = SortingAgent(i, self, i - num_collectors - 1)
+            y, x = divmod(int(self.cells[i - 1]), width)
             self.grid.place_agent(sorter, (x, y))
             self.schedule.add(sorter)
+            self.sorters.append(sorter)
 
         for i in range(num_collectors + num_sorters + 1, num_collectors + num_sorters + num_recyclers + 1):
-            recycler = RecyclingAgent(i, self)
-            x, y = random.randint(0, width - 1), random.randint(0, height - 1)
+            recycler = RecyclingAgent(i, self, i - num_collectors - num_sorters - 1)
+            y, x = divmod(int(self.cells[i - 1]), width)
             self.grid.place_agent(recycler, (x, y))
             self.schedule.add(recycler)
+            self.recyclers.append(recycler)
+        self.agents_by_cell = self.collectors + self.sorters + self.recyclers  # same order as self.cells
+
+        # Unique ids by role index, so per-agent logging never touches the agent objects
+        self.collector_ids = np.arange(1, num_collectors + 1)
+        self.sorter_ids = np.arange(num_collectors + 1, num_collectors + num_sorters + 1)
+        self.recycler_ids = np.arange(num_collectors + num_sorters + 1, num_collectors + num_sorters + num_recyclers + 1)
 
         self.datacollector = DataCollector(
             {
-                "Collected Waste": lambda m: sum(
-                    agent.collected_waste
-                    for agent in m.schedule.agents
-                    if isinstance(agent, CollectionAgent)
-                ),
-                "Sorted Waste": lambda m: sum(
-                    agent.sorted_waste
-                    for agent in m.schedule.agents
-                    if isinstance(agent, SortingAgent)
-                ),
-                "Recycled Waste": lambda m: sum(
-                    agent.recycled_waste
-                    for agent in m.schedule.agents
-                    if isinstance(agent, RecyclingAgent)
-                ),
+                "Collected Waste": lambda m: int(m.collected.sum()),
+                "Sorted Waste": lambda m: int(m.sorted_.sum()),
+                "Recycled Waste": lambda m: int(m.recycled.sum()),
                 "Remaining Waste": lambda m: m.total_waste,
             }
         )
 
     def step(self):
-        self.logger.append(f"--- Step {self.current_step + 1} ---")
-        self.logger.append(f"Total Waste at Start: {self.total_waste}")
+        if self.verbose:
+            self.log_buf.write(f"--- Step {self.current_step + 1} ---\n")
+            self.log_buf.write(f"Total Waste at Start: {self.total_waste}\n")
 
         if self.current_step >= self.max_steps or self.total_waste <= 0:
             if self.current_step >= self.max_steps:
-                self.logger.append("Simulation stopped: Max steps reached.")
+                self.ui_log.append("Simulation stopped: Max steps reached.")
+                if self.verbose:
+                    self.log_buf.write("Simulation stopped: Max steps reached.\n")
             if self.total_waste <= 0:
-                self.logger.append("Simulation stopped: All waste processed.")
+                self.ui_log.append("Simulation stopped: All waste processed.")
+                if self.verbose:
+                    self.log_buf.write("Simulation stopped: All waste processed.\n")
             self.running = False
-            print("\n".join(self.logger))  # Print all logs to the console
+            if self.verbose:
+                self.flush_log()
             return
 
         if self.total_waste > 5:
-            new_waste = random.randint(5, 10)
+            new_waste = int(self.rng.integers(5, 10, endpoint=True))
             self.total_waste += new_waste
-            self.logger.append(f"New waste generated: {new_waste}")
-
-        self.schedule.step()
-        self.datacollector.collect(self)
-        self.logger.append(f"Summary: Total Waste Remaining = {self.total_waste}")
-        self.logger.append(f"------------------------")
-
-        print("\n".join(self.logger))  # Print all logs to the console
+            if self.verbose:
+                self.log_buf.write(f"New waste generated: {new_waste}\n")
+
+        collect, sort, recycle = self.schedule.step()
+
+        # Random walk for everyone at once: each agent picks one of its cell's neighbours
+        pick = self.rng.integers(self.neighbor_counts[self.cells])
+        self.cells = self.neighbors[self.cells, pick]
+
+        if self.datacollector is not None:
+            self.datacollector.collect(self)
+        summary = f"Summary: Total Waste Remaining = {self.total_waste}"
+        self.ui_log.append(summary)
+        if self.verbose:
+            self.log_transfers(collect, sort, recycle)
+            self.log_buf.write(summary)
+            self.log_buf.write("\n------------------------\n")
+            self.flush_log()
         self.current_step += 1
 
+    def sync_grid(self):
+        # Nothing reads the grid during a step, so it is only brought up to date for drawing
+        ys, xs = np.divmod(self.cells, self.grid.width)
+        for agent, x, y in zip(self.agents_by_cell, xs.tolist(), ys.tolist()):
+            if agent.pos != (x, y):
+                self.grid.move_agent(agent, (x, y))
+
+    def log_transfers(self, collect, sort, recycle):
+        write = self.log_buf.write
+        collector_ids, sorter_ids, recycler_ids = self.collector_ids, self.sorter_ids, self.recycler_ids
+        for i in np.flatnonzero(collect):
+            write(f"CollectionAgent {collector_ids[i]} collected {collect[i]} units of waste.\n")
+        for s, c in zip(*np.nonzero(sort)):
+            write(f"SortingAgent {sorter_ids[s]} sorted {sort[s, c]} units of waste from CollectionAgent {collector_ids[c]}.\n")
+        for r, s in zip(*np.nonzero(recycle)):
+            write(f"RecyclingAgent {recycler_ids[r]} recycled {recycle[r, s]} units of waste from SortingAgent {sorter_ids[s]}.\n")
+
+    def flush_log(self):
+        sys.stdout.write(self.log_buf.getvalue())  # Print this step's logs to the console
+        self.log_buf.seek(0)
+        self.log_buf.truncate(0)
+
+
+class EWasteGrid(CanvasGrid):
+    def render(self, model):
+        model.sync_grid()
+        return super().render(model)
+
 
 class LogElement(TextElement):
     def __init__(self):
         super().__init__()
 
     def render(self, model):
-        # Extract specific logs for UI display
-        ui_logs = [log for log in model.logger if "Summary: Total Waste Remaining" in log or "Simulation stopped" in log]
-        return "<br>".join(ui_logs)
+        return "<br>".join(model.ui_log)
+
+
+_COLLECT_TEMPLATE = {"Filled": True, "Layer": 1, "Shape": "rect", "w": 0.8, "h": 0.8, "text_color": "black"}
+_SORT_TEMPLATE = {"Filled": True, "Layer": 1, "Shape": "circle", "r": 0.8, "text_color": "white"}
+_RECYCLE_TEMPLATE = {"Filled": True, "Layer": 1, "Shape": "rect", "w": 0.8, "h": 0.8, "text_color": "white"}
+_WASTE_TEXT = tuple(str(i) for i in range(256))
+
+
+def _waste_text(waste):
+    return _WASTE_TEXT[waste] if waste < len(_WASTE_TEXT) else str(waste)
 
 
 def agent_portrayal(agent):
-    portrayal = {"Filled": True, "Layer": 1}
+    # CanvasGrid adds x/y to the dict it gets back, so hand out a copy of the template
     if isinstance(agent, CollectionAgent):
-        portrayal["Shape"] = "rect"
-        portrayal["Color"] = "orange" if agent.collected_waste > 0 else "yellow"
-        portrayal["w"] = 0.8
-        portrayal["h"] = 0.8
-        portrayal["text"] = str(agent.collected_waste)  # Show collected waste
-        portrayal["text_color"] = "black"
+        waste = agent.collected_waste
+        portrayal = _COLLECT_TEMPLATE.copy()
+        portrayal["Color"] = "orange" if waste > 0 else "yellow"
     elif isinstance(agent, SortingAgent):
-        portrayal["Shape"] = "circle"
-        portrayal["Color"] = "darkblue" if agent.sorted_waste > 0 else "blue"
-        portrayal["r"] = 0.8
-        portrayal["text"] = str(agent.sorted_waste)  # Show sorted waste
-        portrayal["text_color"] = "white"
+        waste = agent.sorted_waste
+        portrayal = _SORT_TEMPLATE.copy()
+        portrayal["Color"] = "darkblue" if waste > 0 else "blue"
     elif isinstance(agent, RecyclingAgent):
-        portrayal["Shape"] = "rect"
-        portrayal["Color"] = "darkgreen" if agent.recycled_waste > 0 else "green"
-        portrayal["w"] = 0.8
-        portrayal["h"] = 0.8
-        portrayal["text"] = str(agent.recycled_waste)  # Show recycled waste
-        portrayal["text_color"] = "white"
+        waste = agent.recycled_waste
+        portrayal = _RECYCLE_TEMPLATE.copy()
+        portrayal["Color"] = "darkgreen" if waste > 0 else "green"
+    else:
+        return {"Filled": True, "Layer": 1}
+    portrayal["text"] = _waste_text(waste)  # Show the agent's waste count
     return portrayal
 
 
-grid = CanvasGrid(agent_portrayal, 10, 10, 500, 500)
-chart = ChartModule(
-    [
-        {"Label": "Collected Waste", "Color": "Yellow"},
-        {"Label": "Sorted Waste", "Color": "Blue"},
-        {"Label": "Recycled Waste", "Color": "Green"},
-        {"Label": "Remaining Waste", "Color": "Red"},
-    ]
-)
-log_element = LogElement()
-
-model_params = {
-    "width": 10,
-    "height": 10,
-    "num_collectors": UserSettableParameter("slider", "Number of Collection Agents", 5, 1, 10, 1),
-    "num_sorters": UserSettableParameter("slider", "Number of Sorting Agents", 3, 1, 10, 1),
-    "num_recyclers": UserSettableParameter("slider", "Number of Recycling Agents", 2, 1, 10, 1),
-    "max_steps": UserSettableParameter("slider", "Max Steps", 200, 10, 200, 10),
-}
-
-server = ModularServer(
-    EWasteModel, [grid, chart, log_element], "E-Waste Recycling Simulation", model_params
-)
-server.port = 8522
+def run_headless(width, height, num_collectors, num_sorters, num_recyclers, max_steps, seed=None):
+    model = EWasteModel(width, height, num_collectors, num_sorters, num_recyclers, max_steps, seed=seed)
+    model.datacollector = None  # nothing reads the chart data outside the UI
+    while model.running:
+        model.step()
+    print(
+        f"Finished after {model.current_step} steps: {int(model.recycled.sum())} units recycled, "
+        f"{model.total_waste} units of waste remaining."
+    )
+    return model.total_waste
+
+
+def _worker(args):
+    seed, kwargs = args
+    return run_headless(seed=seed, **kwargs)
+
+
+def run_many(n_replicas, **kwargs):
+    # Replications are independent models, so spread them over one process per core
+    with multiprocessing.Pool() as pool:
+        return pool.map(_worker, [(seed, kwargs) for seed in range(n_replicas)])
+
+
+def _build_server():
+    grid = EWasteGrid(agent_portrayal, 10, 10, 500, 500)
+    chart = ChartModule(
+        [
+            {"Label": "Collected Waste", "Color": "Yellow"},
+            {"Label": "Sorted Waste", "Color": "Blue"},
+            {"Label": "Recycled Waste", "Color": "Green"},
+            {"Label": "Remaining Waste", "Color": "Red"},
+        ]
+    )
+    log_element = LogElement()
+
+    model_params = {
+        "width": 10,
+        "height": 10,
+        "num_collectors": UserSettableParameter("slider", "Number of Collection Agents", 5, 1, 10, 1),
+        "num_sorters": UserSettableParameter("slider", "Number of Sorting Agents", 3, 1, 10, 1),
+        "num_recyclers": UserSettableParameter("slider", "Number of Recycling Agents", 2, 1, 10, 1),
+        "max_steps": UserSettableParameter("slider", "Max Steps", 200, 10, 200, 10),
+    }
+
+    server = ModularServer(
+        EWasteModel, [grid, chart, log_element], "E-Waste Recycling Simulation", model_params
+    )
+    server.port = 8522
+    return server
+
 
 if __name__ == "__main__":
-    server.launch()
+    _build_server().launch()
@@ -0,0 +1,50 @@
+import sys
+
+import numpy as np
+
+import agent
+
+
+def check(trials=300, seed=0):
+    # Feed both tick implementations the same state, draws and turn orders and
+    # compare everything they return and everything they update in place.
+    rng = np.random.default_rng(seed)
+    for trial in range(trials):
+        c, s, r = (int(n) for n in rng.integers(1, 12, size=3))
+        total_waste = int(rng.integers(0, 60))
+        state = [
+            rng.integers(0, 15, size=c).astype(np.int32),
+            rng.integers(0, 15, size=s).astype(np.int32),
+            rng.integers(0, 15, size=r).astype(np.int32),
+        ]
+        draws = rng.integers(1, 6, size=c + s * c + r * s, dtype=np.int32)
+        args = (
+            draws[:c],
+            draws[c:c + s * c].reshape(s, c),
+            draws[c + s * c:].reshape(r, s),
+            rng.permutation(c),
+            rng.permutation(s),
+            rng.permutation(r),
+        )
+
+        numpy_state = [a.copy() for a in state]
+        numba_state = [a.copy() for a in state]
+        expected = agent._tick_numpy(total_waste, *numpy_state, *args)
+        actual = agent._tick_numba(total_waste, *numba_state, *args)
+
+        if expected[0] != actual[0]:
+            raise AssertionError(f"trial {trial}: remaining waste {actual[0]} != {expected[0]}")
+        for name, want, got in zip(("collect", "sort", "recycle"), expected[1:], actual[1:]):
+            if not np.array_equal(want, got):
+                raise AssertionError(f"trial {trial}: {name} transfers differ")
+        for name, want, got in zip(("collected", "sorted_", "recycled"), numpy_state, numba_state):
+            if not np.array_equal(want, got):
+                raise AssertionError(f"trial {trial}: {name} differs after the tick")
+
+
+if __name__ == "__main__":
+    if agent.njit is None:
+        print("numba is not installed; only _tick_numpy is available, nothing to compare.")
+        sys.exit(0)
+    check()
+    print("_tick_numpy and _tick_numba agree.")